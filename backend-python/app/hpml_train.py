@@ -51,8 +51,20 @@ def hpml_train(
         meta_path: Where to save training metadata and coefficients
         target_name: Optional override for target column name
     """
-    # 1. Load dataset
-    df = pd.read_csv(data_path)
+    # 1. Load dataset. A Parquet cache is kept next to the CSV so repeated
+    # training runs skip CSV parsing; requires pyarrow, with CSV as fallback.
+    parquet_path = data_path.with_suffix(".parquet")
+    try:
+        if (
+            parquet_path.exists()
+            and parquet_path.stat().st_mtime >= data_path.stat().st_mtime
+        ):
+            df = pd.read_parquet(parquet_path, engine="pyarrow")
+        else:
+            df = pd.read_csv(data_path)
+            df.to_parquet(parquet_path, engine="pyarrow", compression="snappy")
+    except ImportError:
+        df = pd.read_csv(data_path)
     
     # === Feature Engineering: Convert to Age of House ===
     df["age_of_house"] = CURRENT_YEAR - df["year_built"]
@@ -120,7 +132,9 @@ def hpml_train(
     )
 
     # 4. Full Pipeline (Preprocessing + Model)
-    model = Ridge(alpha=1.0, random_state=42)
+    # Solve the normal equations (X'X + aI) b = X'y directly via Cholesky
+    # instead of letting sklearn's solver auto-selection iterate
+    model = Ridge(alpha=1.0, solver="cholesky", random_state=42)
     pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('regressor', model)])
 
     # 5. Train the model
@@ -168,14 +182,22 @@ def hpml_train(
         },
         # ADDED: Calculate improvement over baseline
         "improvement_over_baseline_pct": ((mean_absolute_error(y_test, [y_train.mean()] * len(y_test)) - test_mae) / mean_absolute_error(y_test, [y_train.mean()] * len(y_test))) * 100,
-        "model": str(model),
+        "model": type(model).__name__,
+        "intercept": float(pipeline["regressor"].intercept_),
         "coefficients": coefficients,
+        # Canonical importance order, persisted so serving never re-sorts
+        "coefficients_sorted": [
+            [name, float(coef)] for name, coef in coef_importance
+        ],
         # ADDED: Top 5 most important features
         "top_5_important_features": [
             {"feature": name.replace("num__", ""), "coefficient": float(coef)} 
             for name, coef in coef_importance[:5]
         ],
         "is_new_house_age_threshold": float(age_threshold),
+        # Persisted so inference derives large_house from the same cutoff
+        # the model was trained with (no per-batch median recomputation)
+        "training_median_square_footage": float(median_size),
     }
 
     # --- Sample Feature Detection Output (與上一次修改相同) ---
@@ -209,7 +231,32 @@ def hpml_train(
         "features_used": list(X_raw.columns),
         "target": target,
     }
-    joblib.dump(bundle, model_path)
+    # compress=0 keeps the arrays mmap-able at load time
+    joblib.dump(bundle, model_path, compress=0)
+
+    # Compact serving artifact: coef/mean/scale rows that the API memory-maps
+    # read-only, so multiple workers share one copy and skip the unpickle cost
+    fitted_scaler = pipeline.named_steps["preprocessor"].named_transformers_["num"]
+    np.save(
+        model_path.with_name("model_weights.npy"),
+        np.vstack([pipeline["regressor"].coef_, fitted_scaler.mean_, fitted_scaler.scale_]),
+    )
+
+    # Optional: export an ONNX copy for runtimes that prefer it over pickle.
+    # skl2onnx is not a hard dependency, so failure to export is non-fatal.
+    try:
+        from skl2onnx import to_onnx
+
+        onx = to_onnx(
+            pipeline, X_train.to_numpy().astype(np.float32)[:1], target_opset=17
+        )
+        onnx_path = model_path.with_suffix(".onnx")
+        onnx_path.write_bytes(onx.SerializeToString())
+        print(f"ONNX model saved    -> {onnx_path}")
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"ONNX export skipped: {e}")
 
     # 10. Save metadata
     with open(meta_path, "w", encoding="utf-8") as f: